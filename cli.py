@@ -0,0 +1,132 @@
+import argparse
+import os
+import sys
+from typing import List
+
+# 重い依存（pandas / cv2 / matplotlib）は各サブコマンドの実行時にのみ読み込む
+
+
+def run_count(args: argparse.Namespace, visualize: bool):
+    """エリア別人数カウント（visualize=True の場合は可視化画像も出力）"""
+    from count_pic_fixed import DetectionAnalyzer
+
+    analyzer = DetectionAnalyzer()
+    output_dir = args.output_dir if visualize else None
+
+    heatmap = None
+    if args.heatmap is not None:
+        from occupancy_heatmap import OccupancyHeatmap
+        heatmap = OccupancyHeatmap.load(args.heatmap, image_size=analyzer.image_size)
+
+    # 入力がストア（detection_store.py で作成したディレクトリ）ならCSVの再パースを省略
+    if os.path.isdir(args.input):
+        results = analyzer.process_store(
+            store_dir=args.input,
+            image_dir=args.image_dir,
+            output_dir=output_dir,
+            area_count_output=args.area_count_output,
+            visualize=visualize,
+            heatmap=heatmap
+        )
+    else:
+        results = analyzer.process_csv(
+            csv_file_path=args.input,
+            image_dir=args.image_dir,
+            output_dir=output_dir,
+            area_count_output=args.area_count_output,
+            visualize=visualize,
+            heatmap=heatmap
+        )
+
+    if heatmap is not None:
+        heatmap.save(args.heatmap)
+        print(f"ヒートマップを更新しました: {args.heatmap}")
+
+    print("処理完了!")
+    print(f"総画像数: {len(results)}")
+    if len(results) > 0:
+        print(f"結果の例:")
+        print(results.head())
+
+
+def run_heatmap(args: argparse.Namespace):
+    """蓄積したヒートマップにエリアのポリゴンを重ねて描画"""
+    from count_pic_fixed import DetectionAnalyzer
+    from occupancy_heatmap import OccupancyHeatmap
+
+    if not os.path.exists(args.heatmap_path):
+        sys.exit(f"ヒートマップファイルが見つかりません: {args.heatmap_path}")
+
+    analyzer = DetectionAnalyzer()
+    heatmap = OccupancyHeatmap.load(args.heatmap_path)
+    device_ids = args.device or sorted(heatmap.counts)
+    for device_id in device_ids:
+        output_path = os.path.join(args.output_dir, f"{device_id}_heatmap.png")
+        heatmap.render(device_id, output_path, analyzer.device_areas)
+
+
+def run_chart(args: argparse.Namespace):
+    """YOLO検出と目視カウントの誤差の積み上げ棒グラフを作成"""
+    from generate_image import generate_error_chart
+
+    generate_error_chart(args.csv_path, args.output_path, show=not args.no_show)
+
+
+def run_accuracy(args: argparse.Namespace):
+    """YOLO検出と目視カウントの誤差統計のみを表示（グラフは作成しない）"""
+    from generate_image import load_error_data, print_error_stats
+
+    print_error_stats(load_error_data(args.csv_path))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='YOLO人物検出結果の分析ツール')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # count / render は入力と出力CSVの指定が共通
+    def add_count_arguments(subparser: argparse.ArgumentParser):
+        subparser.add_argument('input', help='検出結果CSVファイル、またはdetection_store.pyで作成したストアのディレクトリ')
+        subparser.add_argument('--area-count-output', default='./output/area_count_results.csv',
+                               help='エリア別カウント結果CSVの出力先')
+        subparser.add_argument('--heatmap', default=None,
+                               help='底辺中点を蓄積するヒートマップファイル（.npz、未処理の画像のみ加算）')
+
+    count_parser = subparsers.add_parser('count', help='エリア別人数カウントのみ（画像の描画なし）')
+    add_count_arguments(count_parser)
+    count_parser.add_argument('--image-dir', default=None,
+                              help='画像ディレクトリ（指定すると画像が見つかった検出結果のみをカウント）')
+    count_parser.set_defaults(func=lambda args: run_count(args, visualize=False))
+
+    render_parser = subparsers.add_parser('render', help='エリア別人数カウントと可視化画像の出力')
+    add_count_arguments(render_parser)
+    render_parser.add_argument('--image-dir', default='./data/picture', help='画像ディレクトリ')
+    render_parser.add_argument('--output-dir', default='./output/BB', help='可視化画像の出力ディレクトリ')
+    render_parser.set_defaults(func=lambda args: run_count(args, visualize=True))
+
+    heatmap_parser = subparsers.add_parser('heatmap', help='蓄積したヒートマップをエリアと重ねて描画')
+    heatmap_parser.add_argument('heatmap_path', help='count / render の --heatmap で作成したファイル（.npz）')
+    heatmap_parser.add_argument('--output-dir', default='./output/heatmap', help='ヒートマップPNGの出力ディレクトリ')
+    heatmap_parser.add_argument('--device', action='append', help='描画するデバイスID（複数指定可、省略時は全デバイス）')
+    heatmap_parser.set_defaults(func=run_heatmap)
+
+    chart_parser = subparsers.add_parser('chart', help='誤差の積み上げ棒グラフを作成')
+    chart_parser.add_argument('csv_path', help='人数比較CSV（time, area, Difference 列を含む）')
+    chart_parser.add_argument('--output-path', default='./output/yolo_error_stacked_chart.png',
+                              help='グラフPNGの出力先')
+    chart_parser.add_argument('--no-show', action='store_true', help='グラフを画面に表示しない')
+    chart_parser.set_defaults(func=run_chart)
+
+    accuracy_parser = subparsers.add_parser('accuracy', help='誤差の統計情報のみを表示')
+    accuracy_parser.add_argument('csv_path', help='人数比較CSV（time, area, Difference 列を含む）')
+    accuracy_parser.set_defaults(func=run_accuracy)
+
+    return parser
+
+
+def main(argv: List[str] = None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
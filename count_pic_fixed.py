@@ -1,12 +1,17 @@
 import pandas as pd
-import cv2
 import numpy as np
 import json
 import os
+import sys
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Tuple
 import glob
 
+from detection_store import DetectionStore
+
+if TYPE_CHECKING:
+    from occupancy_heatmap import OccupancyHeatmap
+
 class DetectionAnalyzer:
     def __init__(self):
         # デバイスごとのエリア定義
@@ -174,6 +179,9 @@ class DetectionAnalyzer:
             print(f"画像ファイルが見つかりません: {image_path}")
             return
         
+        # OpenCVは描画する場合のみ読み込む（カウントのみの実行を速くするため）
+        import cv2
+
         # 画像読み込み
         img = cv2.imread(image_path)
         if img is None:
@@ -222,7 +230,107 @@ class DetectionAnalyzer:
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         cv2.imwrite(output_path, img)
 
-    def process_csv(self, csv_file_path: str, image_dir: str, output_dir: str, area_count_output: str):
+    def process_image(self, doc_id: str, device_id: str, created_at: str, loop_count: int,
+                      bboxes: List[Dict], image_dir: str, output_dir: str, visualize: bool = True,
+                      heatmap: 'OccupancyHeatmap' = None) -> Dict:
+        """画像1枚分のエリア別人数カウントと可視化を実行
+
+        image_dir が None の場合は画像を検索せずにカウントのみ行う（visualize=False のときのみ）。
+        heatmap を指定した場合は底辺中点をヒートマップに蓄積する。
+        """
+        print(f"処理中: {device_id}, {created_at}, {loop_count}")
+
+        # 日付と時刻を抽出
+        date_str, time_str = self.parse_datetime_from_utc(created_at)
+
+        # 画像ファイルを検索
+        if image_dir is None and not visualize:
+            image_path = None
+        else:
+            image_path = self.find_image_file(device_id, date_str, time_str, loop_count, image_dir)
+
+            if image_path is None:
+                print(f"画像ファイルが見つかりません: {device_id}_{date_str}_{time_str}_{loop_count}")
+                return None
+
+        # エリア別人数カウント
+        area_counts = self.count_people_in_areas(bboxes, device_id)
+        if heatmap is not None:
+            heatmap.add_image(device_id, created_at, loop_count, bboxes)
+
+        # 結果を記録
+        result = {
+            'document_id': doc_id,
+            'deviceId': device_id,
+            'jst_createdAt': created_at,
+            'loopCount': loop_count,
+            'total_detections': len(bboxes),
+            'image_path': image_path
+        }
+        result.update(area_counts)
+
+        if not visualize:
+            print(f"完了: {device_id}_{date_str}_{time_str}_{loop_count:010d}, エリア別人数: {area_counts}")
+            return result
+
+        # 可視化画像を生成
+        output_filename = f"{device_id}_{date_str}_{time_str}_{loop_count:010d}_annotated.jpg"
+        output_path = os.path.join(output_dir, output_filename)
+        self.draw_visualization(image_path, bboxes, device_id, output_path)
+
+        print(f"完了: {output_filename}, エリア別人数: {area_counts}")
+        return result
+
+    def save_results(self, results: List[Dict], output_dir: str, area_count_output: str) -> pd.DataFrame:
+        """エリア別人数カウント結果をCSVに保存"""
+        results_df = pd.DataFrame(results)
+        os.makedirs(os.path.dirname(area_count_output) or '.', exist_ok=True)
+        results_df.to_csv(area_count_output, index=False, encoding='utf-8-sig')
+
+        print(f"エリア別人数カウント結果を保存: {area_count_output}")
+        if output_dir is not None:
+            print(f"可視化画像を保存: {output_dir}")
+
+        return results_df
+
+    def group_to_bboxes(self, group: pd.DataFrame) -> List[Dict]:
+        """CSVの画像1枚分の行からバウンディングボックス（画像座標）のリストを作成"""
+        bboxes = []
+        for _, row in group.iterrows():
+            # NaNをチェックしてスキップ
+            if (pd.isna(row['x1']) or pd.isna(row['y1']) or 
+                pd.isna(row['x2']) or pd.isna(row['y2'])):
+                print(f"NaN値を検出、スキップ: {row.name}")
+                continue
+                
+            bbox = {
+                'x1': row['x1'],
+                'y1': row['y1'],
+                'x2': row['x2'],
+                'y2': row['y2'],
+                'confidence': row['confidence'],
+                'classId': row['classId']
+            }
+            # 画像座標にスケール
+            scaled_bbox = self.scale_bbox_to_image(bbox)
+            if scaled_bbox is not None:  # NaNチェック後の結果を確認
+                bboxes.append(scaled_bbox)
+        return bboxes
+
+    def store_to_bboxes(self, boxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray) -> List[Dict]:
+        """ストアの画像1枚分の配列からバウンディングボックス（画像座標）のリストを作成"""
+        # ストアの座標は変換時に scale_bbox_to_image と同じ方法でスケール済み
+        return [
+            {
+                'x1': int(x1), 'y1': int(y1), 'x2': int(x2), 'y2': int(y2),
+                'confidence': float(confidence),
+                'classId': int(class_id)
+            }
+            for (x1, y1, x2, y2), confidence, class_id in zip(boxes, confidences, class_ids)
+        ]
+
+    def process_csv(self, csv_file_path: str, image_dir: str, output_dir: str, area_count_output: str,
+                    visualize: bool = True, heatmap: 'OccupancyHeatmap' = None):
         """CSVファイルを処理してエリア別人数カウントと可視化を実行"""
         # CSVファイル読み込み
         df = pd.read_csv(csv_file_path)
@@ -233,96 +341,36 @@ class DetectionAnalyzer:
         results = []
         
         for (doc_id, device_id, created_at, loop_count), group in image_groups:
-            print(f"処理中: {device_id}, {created_at}, {loop_count}")
-            
-            # 日付と時刻を抽出
-            date_str, time_str = self.parse_datetime_from_utc(created_at)
-            
-            # 画像ファイルを検索
-            image_path = self.find_image_file(device_id, date_str, time_str, loop_count, image_dir)
-            
-            if image_path is None:
-                print(f"画像ファイルが見つかりません: {device_id}_{date_str}_{time_str}_{loop_count}")
-                continue
-            
-            # バウンディングボックスデータを処理
-            bboxes = []
-            for _, row in group.iterrows():
-                # NaNをチェックしてスキップ
-                if (pd.isna(row['x1']) or pd.isna(row['y1']) or 
-                    pd.isna(row['x2']) or pd.isna(row['y2'])):
-                    print(f"NaN値を検出、スキップ: {row.name}")
-                    continue
-                    
-                bbox = {
-                    'x1': row['x1'],
-                    'y1': row['y1'],
-                    'x2': row['x2'],
-                    'y2': row['y2'],
-                    'confidence': row['confidence'],
-                    'classId': row['classId']
-                }
-                # 画像座標にスケール
-                scaled_bbox = self.scale_bbox_to_image(bbox)
-                if scaled_bbox is not None:  # NaNチェック後の結果を確認
-                    bboxes.append(scaled_bbox)
-            
-            # エリア別人数カウント
-            area_counts = self.count_people_in_areas(bboxes, device_id)
-            
-            # 結果を記録
-            result = {
-                'document_id': doc_id,
-                'deviceId': device_id,
-                'jst_createdAt': created_at,
-                'loopCount': loop_count,
-                'total_detections': len(bboxes),
-                'image_path': image_path
-            }
-            result.update(area_counts)
-            results.append(result)
-            
-            # 可視化画像を生成
-            output_filename = f"{device_id}_{date_str}_{time_str}_{loop_count:010d}_annotated.jpg"
-            output_path = os.path.join(output_dir, output_filename)
-            self.draw_visualization(image_path, bboxes, device_id, output_path)
-            
-            print(f"完了: {output_filename}, エリア別人数: {area_counts}")
-        
-        # 結果をCSVに保存
-        results_df = pd.DataFrame(results)
-        os.makedirs(os.path.dirname(area_count_output), exist_ok=True)
-        results_df.to_csv(area_count_output, index=False, encoding='utf-8-sig')
+            bboxes = self.group_to_bboxes(group)
+            result = self.process_image(doc_id, device_id, created_at, loop_count,
+                                        bboxes, image_dir, output_dir, visualize, heatmap)
+            if result is not None:
+                results.append(result)
         
-        print(f"エリア別人数カウント結果を保存: {area_count_output}")
-        print(f"可視化画像を保存: {output_dir}")
-        
-        return results_df
+        return self.save_results(results, output_dir, area_count_output)
+
+    def process_store(self, store_dir: str, image_dir: str, output_dir: str, area_count_output: str,
+                      visualize: bool = True, heatmap: 'OccupancyHeatmap' = None):
+        """バイナリストア（detection_store.py で作成）を処理してエリア別人数カウントと可視化を実行"""
+        store = DetectionStore(store_dir)
+        if store.image_size != self.image_size or store.bbox_size != self.bbox_size:
+            raise ValueError(f"ストアの縮尺設定が一致しません: image_size={store.image_size}, bbox_size={store.bbox_size}")
+
+        results = []
+
+        for image, boxes, confidences, class_ids in store:
+            bboxes = self.store_to_bboxes(boxes, confidences, class_ids)
+
+            result = self.process_image(image['document_id'], image['deviceId'], image['jst_createdAt'],
+                                        image['loopCount'], bboxes, image_dir, output_dir, visualize, heatmap)
+            if result is not None:
+                results.append(result)
+
+        return self.save_results(results, output_dir, area_count_output)
 
 def main():
-    # パス設定
-    csv_file_path = "C:\\Users\\keisu\\Desktop\\function\\function\\data\\20250725_目視確認画像に対応した検知結果.csv"
-    image_dir = "./data/picture"
-    output_dir = "C:\\Users\\keisu\\Desktop\\function\\function\\output\\BB"
-    area_count_output = "C:\\Users\\keisu\\Desktop\\function\\function\\output\\area_count_results.csv"
-    
-    # アナライザー初期化
-    analyzer = DetectionAnalyzer()
-    
-    # 処理実行
-    results = analyzer.process_csv(
-        csv_file_path=csv_file_path,
-        image_dir=image_dir,
-        output_dir=output_dir,
-        area_count_output=area_count_output
-    )
-    
-    print("処理完了!")
-    print(f"総画像数: {len(results)}")
-    if len(results) > 0:
-        print(f"結果の例:")
-        print(results.head())
+    from cli import main as cli_main
+    cli_main(['render'] + sys.argv[1:])
 
 if __name__ == "__main__":
     main()
-
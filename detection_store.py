@@ -0,0 +1,170 @@
+import json
+import os
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+# ストアを構成するファイル名とデータ型
+STORE_VERSION = 3
+META_FILE = 'meta.json'             # バージョン・件数・縮尺・文字列キーの幅などのスカラー値のみ
+KEYS_FILE = 'keys.bin'              # (画像数,) 構造化配列: document_id, deviceId, jst_createdAt, loopCount
+BOXES_FILE = 'boxes.i32'            # (N, 4) int32: x1, y1, x2, y2（画像座標系にスケール済み）
+CLASS_ID_FILE = 'class_id.u8'       # (N,) uint8
+CONFIDENCE_FILE = 'confidence.f32'  # (N,) float32
+OFFSETS_FILE = 'offsets.i64'        # (画像数 + 1,) int64: 画像ごとの行範囲
+
+KEY_COLUMNS = ['document_id', 'deviceId', 'jst_createdAt', 'loopCount']
+STRING_KEY_COLUMNS = ['document_id', 'deviceId', 'jst_createdAt']
+BOX_COLUMNS = ['x1', 'y1', 'x2', 'y2']
+
+
+def _keys_dtype(key_widths: Dict[str, int]) -> np.dtype:
+    """画像キーの構造化データ型（文字列はUTF-8の固定長バイト列）"""
+    return np.dtype([(col, f'S{key_widths[col]}') for col in STRING_KEY_COLUMNS] + [('loopCount', '<i8')])
+
+
+def _expand_detections_array(df) -> 'pd.DataFrame':
+    """detections_array列のみのエクスポートを1バウンディングボックス1行に展開"""
+    import pandas as pd
+
+    rows = []
+    # 同じ画像の行にはすべて同じ配列が入っているので、画像ごとに1回だけパースする
+    for key, group in df.groupby(KEY_COLUMNS, sort=False):
+        detections_array = group['detections_array'].iloc[0]
+        detections = json.loads(detections_array) if isinstance(detections_array, str) else []
+        if not detections:
+            # 検出0件の画像も残すため、座標がNaNの行を1行入れておく
+            rows.append(dict(zip(KEY_COLUMNS, key)))
+        for det in detections:
+            row = dict(zip(KEY_COLUMNS, key))
+            row.update({col: det.get(col) for col in BOX_COLUMNS + ['confidence', 'classId']})
+            rows.append(row)
+    return pd.DataFrame(rows, columns=KEY_COLUMNS + BOX_COLUMNS + ['confidence', 'classId'])
+
+
+def convert_csv_to_store(csv_file_path: str, store_dir: str, image_size: Tuple[int, int] = (4160, 3120),
+                         bbox_size: Tuple[int, int] = (1024, 768)) -> int:
+    """検出結果CSVを一度だけパースしてバイナリ列指向ストアに変換
+
+    バウンディングボックスは DetectionAnalyzer.scale_bbox_to_image と同じく、
+    CSVから読んだfloat64の値に縮尺を掛けて int() で切り捨てた画像座標として保存する。
+
+    Returns:
+        ストアに格納した画像数
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_file_path)
+    if not set(BOX_COLUMNS).issubset(df.columns):
+        df = _expand_detections_array(df)
+
+    # groupby と同じ順序（キー昇順）で画像ごとに連続配置する
+    df = df.dropna(subset=KEY_COLUMNS).sort_values(KEY_COLUMNS, kind='stable')
+
+    # process_csv と同じく座標にNaNを含む行は除外するが、画像（キー）は検出0件でも残す
+    valid = df[BOX_COLUMNS].notna().all(axis=1)
+    group_sizes = valid.groupby([df[col] for col in KEY_COLUMNS], sort=True).sum()
+    df = df[valid]
+
+    offsets = np.zeros(len(group_sizes) + 1, dtype=np.int64)
+    np.cumsum(group_sizes.to_numpy(), out=offsets[1:])
+
+    os.makedirs(store_dir, exist_ok=True)
+    # float32で保存してから掛けると、22.4 * 4.0625 のような値で1ピクセルずれるのでここでスケールする
+    scale_x = image_size[0] / bbox_size[0]
+    scale_y = image_size[1] / bbox_size[1]
+    scale = np.array([scale_x, scale_y, scale_x, scale_y])
+    boxes = (df[BOX_COLUMNS].to_numpy(dtype=np.float64) * scale).astype(np.int32)
+    boxes.tofile(os.path.join(store_dir, BOXES_FILE))
+    df['classId'].fillna(0).to_numpy(dtype=np.uint8).tofile(os.path.join(store_dir, CLASS_ID_FILE))
+    df['confidence'].to_numpy(dtype=np.float32).tofile(os.path.join(store_dir, CONFIDENCE_FILE))
+    offsets.tofile(os.path.join(store_dir, OFFSETS_FILE))
+
+    encoded = {
+        col: [str(value).encode('utf-8') for value in group_sizes.index.get_level_values(col)]
+        for col in STRING_KEY_COLUMNS
+    }
+    key_widths = {col: max([1] + [len(value) for value in values]) for col, values in encoded.items()}
+    keys = np.empty(len(group_sizes), dtype=_keys_dtype(key_widths))
+    for col, values in encoded.items():
+        keys[col] = values
+    keys['loopCount'] = group_sizes.index.get_level_values('loopCount').astype(np.int64)
+    keys.tofile(os.path.join(store_dir, KEYS_FILE))
+
+    meta = {
+        'version': STORE_VERSION,
+        'source': os.path.basename(csv_file_path),
+        'num_detections': int(offsets[-1]),
+        'num_images': len(keys),
+        'image_size': list(image_size),
+        'bbox_size': list(bbox_size),
+        'key_widths': key_widths
+    }
+    with open(os.path.join(store_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    return len(keys)
+
+
+class DetectionStore:
+    """convert_csv_to_store で作成したストアを np.memmap で開く（ゼロコピー）"""
+
+    def __init__(self, store_dir: str):
+        with open(os.path.join(store_dir, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"未対応のストアバージョンです: {meta.get('version')}")
+
+        self.store_dir = store_dir
+        self.num_images = meta['num_images']
+        self.image_size = tuple(meta['image_size'])
+        self.bbox_size = tuple(meta['bbox_size'])
+        num_detections = meta['num_detections']
+
+        self.keys = self._open(KEYS_FILE, _keys_dtype(meta['key_widths']), (self.num_images,))
+        self.offsets = self._open(OFFSETS_FILE, np.int64, (self.num_images + 1,))
+        self.boxes = self._open(BOXES_FILE, np.int32, (num_detections, 4))
+        self.class_ids = self._open(CLASS_ID_FILE, np.uint8, (num_detections,))
+        self.confidences = self._open(CONFIDENCE_FILE, np.float32, (num_detections,))
+
+    def _open(self, filename: str, dtype, shape: Tuple[int, ...]) -> np.ndarray:
+        # 0バイトのファイルは memmap できないので空配列を返す
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.store_dir, filename), dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self) -> int:
+        return self.num_images
+
+    def get_key(self, index: int) -> Dict:
+        """画像1枚分のキー（document_id / deviceId / jst_createdAt / loopCount）"""
+        record = self.keys[index]
+        key = {col: record[col].decode('utf-8') for col in STRING_KEY_COLUMNS}
+        key['loopCount'] = int(record['loopCount'])
+        return key
+
+    def get_image(self, index: int) -> Tuple[Dict, np.ndarray, np.ndarray, np.ndarray]:
+        """画像1枚分のキーと、boxes / confidence / classId のビューを返す"""
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return (self.get_key(index), self.boxes[start:end],
+                self.confidences[start:end], self.class_ids[start:end])
+
+    def __iter__(self) -> Iterator[Tuple[Dict, np.ndarray, np.ndarray, np.ndarray]]:
+        for i in range(self.num_images):
+            yield self.get_image(i)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='検出結果CSVをバイナリストアに変換')
+    parser.add_argument('csv_file_path', help='検出結果CSVファイル')
+    parser.add_argument('store_dir', help='ストアの出力ディレクトリ')
+    args = parser.parse_args()
+
+    num_images = convert_csv_to_store(args.csv_file_path, args.store_dir)
+    print(f"ストアを作成しました: {args.store_dir}（画像数: {num_images}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class OccupancyHeatmap:
+    """デバイスごとに底辺中点（人の立ち位置）を固定解像度の2次元ヒストグラムに蓄積"""
+
+    def __init__(self, image_size: Tuple[int, int] = (4160, 3120), bins: Tuple[int, int] = (208, 156)):
+        # bins は (x方向, y方向) のセル数（既定値は20ピクセル四方のセル）
+        self.image_size = image_size
+        self.bins = bins
+        self.counts: Dict[str, np.ndarray] = {}
+        # デバイスごとの蓄積済みの最新画像 (jst_createdAt, loopCount)。これ以前の画像は加算しない
+        self.high_water: Dict[str, Tuple[str, int]] = {}
+        # 今回の実行で加算した最新画像（save で high_water に反映する）
+        self.pending_high_water: Dict[str, Tuple[str, int]] = {}
+
+    @classmethod
+    def load(cls, path: str, image_size: Tuple[int, int] = (4160, 3120),
+             bins: Tuple[int, int] = (208, 156)) -> 'OccupancyHeatmap':
+        """保存済みのヒートマップを読み込む（ファイルがなければ空のヒートマップ）"""
+        if not os.path.exists(path):
+            return cls(image_size, bins)
+
+        with np.load(path) as data:
+            heatmap = cls(tuple(int(v) for v in data['image_size']), tuple(int(v) for v in data['bins']))
+            for key in data.files:
+                if key.startswith('counts_'):
+                    heatmap.counts[key[len('counts_'):]] = data[key]
+            for device_id, created_at, loop_count in zip(data['hw_devices'].tolist(),
+                                                         data['hw_created_at'].tolist(),
+                                                         data['hw_loop_count'].tolist()):
+                heatmap.high_water[device_id] = (created_at, int(loop_count))
+        return heatmap
+
+    def save(self, path: str):
+        """今回の実行分を確定し、ヒートマップを圧縮した配列ファイル（.npz）に保存"""
+        for device_id, mark in self.pending_high_water.items():
+            if device_id not in self.high_water or mark > self.high_water[device_id]:
+                self.high_water[device_id] = mark
+        self.pending_high_water = {}
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        device_ids = sorted(self.high_water)
+        arrays = {f'counts_{device_id}': counts for device_id, counts in self.counts.items()}
+        # 書き込み途中で中断されても既存のファイルが壊れないよう、一時ファイル経由で置き換える
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                image_size=np.array(self.image_size),
+                bins=np.array(self.bins),
+                hw_devices=np.array(device_ids, dtype=str),
+                hw_created_at=np.array([self.high_water[d][0] for d in device_ids], dtype=str),
+                hw_loop_count=np.array([self.high_water[d][1] for d in device_ids], dtype=np.int64),
+                **arrays
+            )
+        os.replace(tmp_path, path)
+
+    def add_points(self, device_id: str, points: np.ndarray):
+        """画像座標の点 (N, 2) をヒストグラムに加算"""
+        width, height = self.image_size
+        bins_x, bins_y = self.bins
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        x, y = points[:, 0], points[:, 1]
+
+        # 画像の範囲外の点は除外（右端・下端ちょうどの点は最後のセルに含める）
+        inside = (x >= 0) & (x <= width) & (y >= 0) & (y <= height)
+        ix = np.minimum((x[inside] * bins_x / width).astype(np.int64), bins_x - 1)
+        iy = np.minimum((y[inside] * bins_y / height).astype(np.int64), bins_y - 1)
+
+        hist = np.bincount(iy * bins_x + ix, minlength=bins_x * bins_y).reshape(bins_y, bins_x)
+        if device_id not in self.counts:
+            self.counts[device_id] = np.zeros((bins_y, bins_x), dtype=np.uint32)
+        self.counts[device_id] += hist.astype(np.uint32)
+
+    def add_image(self, device_id: str, created_at: str, loop_count: int, bboxes: List[Dict]) -> bool:
+        """画像1枚分のバウンディングボックス（画像座標）の底辺中点を加算
+
+        読み込んだ時点の high_water 以前（jst_createdAt, loopCount が同じか古い）の画像は
+        前回までに蓄積済みとみなして加算しない。1回の実行内では画像の順序は問わない。
+
+        Returns:
+            加算した場合は True、蓄積済みの画像の場合は False
+        """
+        mark = (str(created_at), int(loop_count))
+        if device_id in self.high_water and mark <= self.high_water[device_id]:
+            return False
+
+        if bboxes:
+            boxes = np.array([(bbox['x1'], bbox['x2'], bbox['y2']) for bbox in bboxes], dtype=np.float64)
+            # count_people_in_areas と同じ底辺中点
+            points = np.stack([(boxes[:, 0] + boxes[:, 1]) / 2, boxes[:, 2]], axis=1)
+            self.add_points(device_id, points)
+        if device_id not in self.pending_high_water or mark > self.pending_high_water[device_id]:
+            self.pending_high_water[device_id] = mark
+        return True
+
+    def render(self, device_id: str, output_path: str, device_areas: Dict[str, Dict[str, Dict]] = None):
+        """ヒートマップを描画し、エリアのポリゴンを重ねてPNGとして保存"""
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        from matplotlib.patches import Polygon
+
+        width, height = self.image_size
+        bins_x, bins_y = self.bins
+        counts = self.counts.get(device_id, np.zeros((bins_y, bins_x), dtype=np.uint32))
+
+        fig, ax = plt.subplots(figsize=(12, 9))
+        im = ax.imshow(counts, extent=(0, width, height, 0), cmap='inferno', interpolation='nearest')
+        fig.colorbar(im, ax=ax, label='Detections')
+
+        # エリアのポリゴンを重ねる
+        areas = (device_areas or {}).get(device_id, {})
+        colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        for i, (area_name, area_data) in enumerate(areas.items()):
+            color = colors[i % len(colors)]
+            ax.add_patch(Polygon(area_data['polygon'], closed=True, fill=False, edgecolor=color, linewidth=2))
+            centroid = np.mean(area_data['polygon'], axis=0)
+            ax.text(centroid[0], centroid[1], area_name, color=color, fontsize=12, fontweight='bold')
+
+        ax.set_xlim(0, width)
+        ax.set_ylim(height, 0)
+        ax.set_title(f'{device_id}: Occupancy Heatmap (total {int(counts.sum())} detections)')
+
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        fig.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white')
+        plt.close(fig)
+        print(f"ヒートマップを保存しました: {output_path}")
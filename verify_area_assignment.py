@@ -0,0 +1,215 @@
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from count_pic_fixed import DetectionAnalyzer
+
+# エリア判定の実装: (点の配列 (N, 2), ポリゴンのリスト) -> エリア番号の配列 (N,)（該当なしは -1）
+AssignFunc = Callable[[np.ndarray, List[List[Tuple[int, int]]]], np.ndarray]
+
+
+def assign_reference(analyzer: DetectionAnalyzer) -> AssignFunc:
+    """point_in_polygon を使った基準実装（count_people_in_areas と同じ判定順）"""
+    def assign(points: np.ndarray, polygons: List[List[Tuple[int, int]]]) -> np.ndarray:
+        result = np.full(len(points), -1, dtype=np.int64)
+        for i, (x, y) in enumerate(points.tolist()):
+            for area_index, polygon in enumerate(polygons):
+                if analyzer.point_in_polygon((x, y), polygon):
+                    result[i] = area_index
+                    break  # 最初に見つかったエリアのみ
+        return result
+    return assign
+
+
+def assign_vectorized(points: np.ndarray, polygons: List[List[Tuple[int, int]]]) -> np.ndarray:
+    """point_in_polygon と同じ条件分岐・演算順序をNumPyで辺ごとにまとめて評価"""
+    x = points[:, 0]
+    y = points[:, 1]
+    result = np.full(len(points), -1, dtype=np.int64)
+    unassigned = np.ones(len(points), dtype=bool)
+
+    for area_index, polygon in enumerate(polygons):
+        inside = np.zeros(len(points), dtype=bool)
+        n = len(polygon)
+        for i in range(n):
+            p1x, p1y = polygon[i]
+            p2x, p2y = polygon[(i + 1) % n]
+            # 水平な辺は y > min かつ y <= max を満たさないので反転に寄与しない
+            if p1y == p2y:
+                continue
+            crossing = (y > min(p1y, p2y)) & (y <= max(p1y, p2y)) & (x <= max(p1x, p2x))
+            if p1x != p2x:
+                xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                crossing &= x <= xinters
+            inside ^= crossing
+
+        hit = inside & unassigned
+        result[hit] = area_index
+        unassigned &= ~hit
+
+    return result
+
+
+def edge_points(p1: Tuple[int, int], p2: Tuple[int, int], num: int) -> List[Tuple[float, float]]:
+    """辺上の点（整数格子点と、底辺中点で現れる0.5刻みの点を含む）"""
+    (x1, y1), (x2, y2) = p1, p2
+    points = [((x1 + x2) / 2, (y1 + y2) / 2)]
+    g = int(np.gcd(abs(x2 - x1), abs(y2 - y1)))
+    if g > 0:
+        step = max(1, g // num)
+        for k in range(0, g + 1, step):
+            points.append((x1 + (x2 - x1) * k / g, y1 + (y2 - y1) * k / g))
+    for t in np.linspace(0.0, 1.0, num):
+        points.append((x1 + (x2 - x1) * t, y1 + (y2 - y1) * t))
+    return points
+
+
+def adversarial_points(polygons: List[List[Tuple[int, int]]], image_size: Tuple[int, int],
+                       rng: np.random.Generator, num_per_edge: int = 16) -> np.ndarray:
+    """頂点・共有辺・水平辺・画像の枠上とその近傍の点を生成"""
+    width, height = image_size
+    base = []
+
+    for polygon in polygons:
+        n = len(polygon)
+        for i in range(n):
+            p1, p2 = polygon[i], polygon[(i + 1) % n]
+            base.append(p1)
+            base.extend(edge_points(p1, p2, num_per_edge))
+            if p1[1] == p2[1]:
+                # 水平辺はx方向に延長した位置も調べる
+                base.extend((x, p1[1]) for x in np.linspace(0, width, num_per_edge))
+
+    # 画像の枠上
+    for t in np.linspace(0.0, 1.0, num_per_edge * 4):
+        base.extend([(t * width, 0), (t * width, height), (0, t * height), (width, t * height)])
+    base.extend([(0, 0), (width, 0), (0, height), (width, height)])
+
+    base = np.array(base, dtype=np.float64)
+
+    # 境界のすぐ内側・外側（0.5刻みと微小量）にずらした点も加える
+    offsets = np.array([(0, 0), (0.5, 0), (-0.5, 0), (0, 1), (0, -1),
+                        (1e-9, 0), (-1e-9, 0), (0, 1e-9), (0, -1e-9)])
+    points = (base[:, None, :] + offsets[None, :, :]).reshape(-1, 2)
+    jitter = base + rng.uniform(-2, 2, size=base.shape)
+    return np.concatenate([points, jitter])
+
+
+def random_points(image_size: Tuple[int, int], rng: np.random.Generator, num: int) -> np.ndarray:
+    """count_people_in_areas の底辺中点と同じく、xは0.5刻み・yは整数の点"""
+    width, height = image_size
+    x = rng.integers(0, 2 * width + 1, size=num) / 2
+    y = rng.integers(0, height + 1, size=num).astype(np.float64)
+    return np.stack([x, y], axis=1)
+
+
+def random_polygons(image_size: Tuple[int, int], rng: np.random.Generator) -> List[List[Tuple[int, int]]]:
+    """ランダムな星形多角形を対角線で分割し、辺を共有する複数のポリゴンを作る"""
+    width, height = image_size
+    cx, cy = rng.uniform(0.2, 0.8) * width, rng.uniform(0.2, 0.8) * height
+    n = int(rng.integers(4, 10))
+    angles = np.sort(rng.uniform(0, 2 * np.pi, size=n))
+    radii = rng.uniform(0.1, 0.6, size=n) * min(width, height)
+    xs = np.clip(np.round(cx + radii * np.cos(angles)), 0, width).astype(int)
+    ys = np.clip(np.round(cy + radii * np.sin(angles)), 0, height).astype(int)
+    # 水平辺を含むケースを作るため、一部の頂点のyを前の頂点に揃える
+    for i in range(1, n):
+        if rng.random() < 0.2:
+            ys[i] = ys[i - 1]
+    vertices = [(int(px), int(py)) for px, py in zip(xs, ys)]
+
+    polygons = [vertices]
+    # 中心を通る分割で辺を共有する2つのポリゴンにする
+    if n >= 4 and rng.random() < 0.7:
+        center = (int(round(cx)), int(round(cy)))
+        k = int(rng.integers(2, n - 1))
+        polygons = [[center] + vertices[:k + 1], [center] + vertices[k:] + vertices[:1]]
+
+    # 枠に接する矩形のポリゴンを追加
+    if rng.random() < 0.5:
+        x0 = int(rng.integers(0, width // 2))
+        y0 = int(rng.integers(0, height // 2))
+        polygons.append([(x0, y0), (width, y0), (width, height), (x0, height)])
+
+    order = rng.permutation(len(polygons))
+    return [polygons[i] for i in order]
+
+
+def run_case(implementations: Dict[str, AssignFunc], reference: AssignFunc, points: np.ndarray,
+             polygons: List[List[Tuple[int, int]]], timings: Dict[str, float]) -> Dict[str, int]:
+    """基準実装と各実装の結果を比較し、実装ごとの不一致件数を返す"""
+    start = time.perf_counter()
+    expected = reference(points, polygons)
+    timings['reference'] = timings.get('reference', 0.0) + time.perf_counter() - start
+
+    mismatches = {}
+    for name, impl in implementations.items():
+        start = time.perf_counter()
+        actual = impl(points, polygons)
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+        mismatch = np.flatnonzero(expected != actual)
+        for i in mismatch[:5]:
+            print(f"  不一致 [{name}] 点={tuple(points[i].tolist())}: 基準={expected[i]}, 実装={actual[i]}")
+        mismatches[name] = len(mismatch)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='高速エリア判定と point_in_polygon の差分検証')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード')
+    parser.add_argument('--random-points', type=int, default=20000, help='デバイスごとのランダム点の数')
+    parser.add_argument('--random-polygons', type=int, default=200, help='ランダムポリゴンの試行回数')
+    args = parser.parse_args()
+
+    analyzer = DetectionAnalyzer()
+    reference = assign_reference(analyzer)
+    implementations: Dict[str, AssignFunc] = {
+        'vectorized': assign_vectorized,
+    }
+
+    rng = np.random.default_rng(args.seed)
+    mismatches = {name: 0 for name in implementations}
+    num_points = 0
+    timings: Dict[str, float] = {}
+
+    # 設定済みの各デバイスのエリア
+    for device_id, areas in analyzer.device_areas.items():
+        polygons = [area_data['polygon'] for area_data in areas.values()]
+        points = np.concatenate([
+            adversarial_points(polygons, analyzer.image_size, rng),
+            random_points(analyzer.image_size, rng, args.random_points)
+        ])
+        num_points += len(points)
+        for name, count in run_case(implementations, reference, points, polygons, timings).items():
+            mismatches[name] += count
+            print(f"{device_id}: [{name}] {len(points)}点中 不一致 {count}件")
+
+    # ランダムなポリゴン
+    for _ in range(args.random_polygons):
+        polygons = random_polygons(analyzer.image_size, rng)
+        points = np.concatenate([
+            adversarial_points(polygons, analyzer.image_size, rng, num_per_edge=4),
+            random_points(analyzer.image_size, rng, 500)
+        ])
+        num_points += len(points)
+        for name, count in run_case(implementations, reference, points, polygons, timings).items():
+            mismatches[name] += count
+
+    print("\n=== 結果 ===")
+    reference_time = timings['reference']
+    for name in implementations:
+        impl_time = timings[name]
+        speedup = reference_time / impl_time if impl_time > 0 else float('inf')
+        print(f"{name}: {num_points}点中 不一致 {mismatches[name]}件, "
+              f"速度 {speedup:.1f}倍（基準 {reference_time:.3f}秒 / 実装 {impl_time:.3f}秒）")
+
+    if any(mismatches.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
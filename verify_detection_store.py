@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from count_pic_fixed import DetectionAnalyzer
+from detection_store import BOX_COLUMNS, KEY_COLUMNS, DetectionStore, convert_csv_to_store
+
+
+def short_decimal(value: float, rng: np.random.Generator) -> float:
+    """実際のエクスポートと同じく、float32を最短表記したような短い小数（例: 22.4, 599.2549）にする"""
+    if rng.random() < 0.5:
+        return round(value, int(rng.integers(1, 5)))
+    return float(str(np.float32(value)))
+
+
+def synthetic_export(device_ids, rng: np.random.Generator, num_images: int) -> pd.DataFrame:
+    """検出0件の画像や座標がNaNの行を含む検出結果CSV（1バウンディングボックス1行）を生成"""
+    rows = []
+    for i in range(num_images):
+        device_id = device_ids[i % len(device_ids)]
+        detections = []
+        for _ in range(int(rng.integers(0, 7))):
+            x1, y1 = short_decimal(rng.uniform(0, 1000), rng), short_decimal(rng.uniform(0, 700), rng)
+            detections.append({
+                'x1': x1, 'y1': y1,
+                'x2': short_decimal(x1 + rng.uniform(1, 60), rng),
+                'y2': short_decimal(y1 + rng.uniform(1, 80), rng),
+                'confidence': short_decimal(rng.uniform(0.5, 1.0), rng), 'classId': 0
+            })
+
+        key = {
+            'document_id': f"doc{i:04d}",
+            'jst_createdAt': f"2025-07-22 {9 + i // 60:02d}:{i % 60:02d}:00.000000 UTC",
+            'deviceId': device_id,
+            'detectionCount': len(detections),
+            'loopCount': 10000 + i,
+            'detections_array': json.dumps(detections)
+        }
+        if not detections:
+            # 検出0件の画像は座標が空の行として出力される
+            rows.append(dict(key, **{col: np.nan for col in BOX_COLUMNS + ['confidence', 'classId']}))
+        for det in detections:
+            rows.append(dict(key, **det))
+        if detections and rng.random() < 0.2:
+            # 座標が欠損した行（process_csv ではスキップされる）
+            rows.append(dict(key, **{col: np.nan for col in BOX_COLUMNS}, confidence=0.5, classId=0))
+
+    return pd.DataFrame(rows)
+
+
+def count_results(analyzer: DetectionAnalyzer, source: str, output_path: str, from_store: bool) -> pd.DataFrame:
+    """カウントのみ実行し、出力されたCSVを読み込んで返す"""
+    process = analyzer.process_store if from_store else analyzer.process_csv
+    process(source, image_dir=None, output_dir=None, area_count_output=output_path, visualize=False)
+    return pd.read_csv(output_path)
+
+
+def count_coordinate_mismatches(analyzer: DetectionAnalyzer, csv_path: str, store_dir: str) -> int:
+    """画像ごとに、CSV経由とストア経由の画像座標が1ピクセルも違わないかを比較して不一致件数を返す"""
+    expected = {}
+    for (doc_id, device_id, created_at, loop_count), group in pd.read_csv(csv_path).groupby(KEY_COLUMNS):
+        bboxes = analyzer.group_to_bboxes(group)
+        expected[(str(doc_id), device_id, created_at, int(loop_count))] = [
+            (bbox['x1'], bbox['y1'], bbox['x2'], bbox['y2']) for bbox in bboxes
+        ]
+
+    mismatches = 0
+    for image, boxes, confidences, class_ids in DetectionStore(store_dir):
+        key = (image['document_id'], image['deviceId'], image['jst_createdAt'], image['loopCount'])
+        actual = [
+            (bbox['x1'], bbox['y1'], bbox['x2'], bbox['y2'])
+            for bbox in analyzer.store_to_bboxes(boxes, confidences, class_ids)
+        ]
+        if expected.get(key) != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  座標の不一致 {key}: CSV={expected.get(key)}, ストア={actual}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='process_csv と process_store の座標・結果の一致を検証')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード')
+    parser.add_argument('--num-images', type=int, default=200, help='生成する画像数')
+    args = parser.parse_args()
+
+    analyzer = DetectionAnalyzer()
+    rng = np.random.default_rng(args.seed)
+    df = synthetic_export(list(analyzer.device_areas), rng, args.num_images)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'detections.csv')
+        raw_csv_path = os.path.join(tmp_dir, 'detections_raw.csv')
+        df.to_csv(csv_path, index=False)
+        # detections_array 列のみのエクスポート
+        df.drop(columns=BOX_COLUMNS + ['confidence', 'classId']).to_csv(raw_csv_path, index=False)
+
+        expected = count_results(analyzer, csv_path, os.path.join(tmp_dir, 'expected.csv'), from_store=False)
+
+        for name, source in [('CSV', csv_path), ('detections_array', raw_csv_path)]:
+            store_dir = os.path.join(tmp_dir, f'store_{name}')
+            convert_csv_to_store(source, store_dir, analyzer.image_size, analyzer.bbox_size)
+            actual = count_results(analyzer, store_dir, os.path.join(tmp_dir, f'actual_{name}.csv'), from_store=True)
+
+            coordinate_mismatches = count_coordinate_mismatches(analyzer, csv_path, store_dir)
+            if coordinate_mismatches:
+                failed = True
+                print(f"[{name}] 座標の不一致: {coordinate_mismatches}画像")
+
+            try:
+                pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+                print(f"[{name}] 一致: {len(actual)}画像（検出0件 {int((actual['total_detections'] == 0).sum())}画像）")
+            except AssertionError as e:
+                failed = True
+                print(f"[{name}] 不一致: process_csv {len(expected)}画像 / process_store {len(actual)}画像\n{e}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()